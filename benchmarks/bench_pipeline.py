@@ -0,0 +1,200 @@
+"""Benchmark: end-to-end Direct and Review pipelines with the network services stubbed out.
+
+Generates synthetic speech-and-silence videos, swaps speech recognition, translation and TTS for
+local fakes with configurable latency, and runs each case in a fresh subprocess so that its peak
+RSS is its own. Reports wall time, throughput, service calls per minute of video, per-stage
+latency and peak RSS; --save-baseline stores the results and later runs are compared against them.
+
+Usage:
+    python benchmarks/bench_pipeline.py --minutes 1 5 --modes direct review
+    python benchmarks/bench_pipeline.py --minutes 1 5 --save-baseline     # baselines are machine-specific
+    python benchmarks/bench_pipeline.py --minutes 1 5 --tolerance 0.25   # exit 1 on regression
+    python benchmarks/bench_pipeline.py --minutes 1 --modes direct --languages ta te hi
+    python benchmarks/bench_pipeline.py --minutes 1 --translation-linger-ms 0   # translate requests without batching linger
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'pipeline.json')
+STAGES = ('download', 'extract', 'segment', 'chunks', 'merge')
+os.environ.setdefault('WARM_UP', '0') # The services are faked; cases must not race the warm-up thread
+
+
+def make_video(path, minutes, seed=0):
+    """Synthetic speech/silence audio (see bench_silence) muxed with a tiny static video track."""
+    sys.path.insert(0, ROOT); sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from bench_silence import synthetic_speech
+    import app
+    wav_path = path + '.wav'
+    synthetic_speech(int(minutes * 60_000), seed=seed).export(wav_path, format='wav')
+    success, msg = app.run_ffmpeg(['-f', 'lavfi', '-i', 'color=c=black:s=160x90:r=10', '-i', wav_path, '-shortest',
+                                   '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'stillimage', '-c:a', 'aac', path])
+    os.remove(wav_path)
+    if not success: sys.exit(f"Could not build the synthetic video: {msg}")
+
+
+def install_fakes(app, asr_ms, translate_ms, tts_ms):
+    """Replaces the network-bound services with local fakes that only sleep; returns their call counters."""
+    from pydub.generators import Sine
+    calls = {'asr': 0, 'translate': 0, 'tts': 0} # One increment per request a real service would receive
+
+    class FakeTranscription(app.TranscriptionBackend):
+        name = 'bench'
+        def transcribe(self, segment):
+            calls['asr'] += 1
+            time.sleep(asr_ms / 1000)
+            return f"segment of {len(segment)} milliseconds", "Transcription successful (bench)."
+
+    class FakeTranslation(app.TranslationBackend):
+        name = 'bench'
+        def translate_many(self, texts, target):
+            calls['translate'] += 1
+            time.sleep(translate_ms / 1000) # Per request, however many texts were packed into it
+            return [f"[{target}] {text}" for text in texts]
+
+    tone = io.BytesIO(); Sine(220).to_audio_segment(duration=1000).apply_gain(-12).export(tone, format='mp3')
+    tone = tone.getvalue()
+    def fake_tts(text, voice):
+        calls['tts'] += 1
+        time.sleep(tts_ms / 1000)
+        return True, "OK (bench).", tone
+
+    app._transcription_backends[app.ASR_BACKEND] = FakeTranscription()
+    app._translation_backends[app.TRANSLATION_BACKEND] = FakeTranslation()
+    app.synthesize_speech = fake_tts
+    app.resolve_tts_voice = lambda voice, *args, **kwargs: ("ta-IN-PallaviNeural", "Using bench voice.")
+    return calls
+
+
+def wait_for(app, job):
+    while job['status'] not in app.JOB_FINISHED_STATUSES: time.sleep(0.05)
+    if job['status'] != 'completed': sys.exit(f"Job failed: {job['message']}")
+    return job
+
+
+def stage_seconds(*jobs):
+    totals = {}
+    for job in jobs:
+        for stage in job['stages']:
+            if stage['finished_at']: totals[stage['stage']] = totals.get(stage['stage'], 0.0) + stage['finished_at'] - stage['started_at']
+    return {stage: round(seconds, 3) for stage, seconds in totals.items()}
+
+
+def run_case(case):
+    """Runs one benchmark case in this process and returns its measurements."""
+    os.environ.update({'CACHE_ENABLED': '0', 'ASR_RATE_LIMIT': '0', 'TRANSLATE_RATE_LIMIT': '0', 'TTS_RATE_LIMIT': '0',
+                       'SEGMENT_OPTIMIZER': '1' if case.get('segment_optimizer', True) else '0'})
+    if case.get('linger_ms') is not None: os.environ['TRANSLATION_BATCH_LINGER_MS'] = str(case['linger_ms'])
+    sys.path.insert(0, ROOT); sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    import app
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    try:
+        for key, folder in (('UPLOAD_FOLDER', workdir), ('JOBS_FOLDER', os.path.join(workdir, 'jobs')), ('TEMP_DIRECT_FOLDER', os.path.join(workdir, 'temp_direct'))):
+            os.makedirs(folder, exist_ok=True); app.app.config[key] = folder
+        app.HLS_FOLDER = os.path.join(workdir, 'hls') # Progressive output streams
+        calls = install_fakes(app, case['asr_ms'], case['translate_ms'], case['tts_ms'])
+        video_path = os.path.join(workdir, 'bench.mp4')
+        shutil.copy(case['video'], video_path) # The pipelines consume (move) their input
+
+        started = time.perf_counter()
+        if case['mode'] == 'direct':
+            jobs = [wait_for(app, app.submit_job('bench', app.run_full_pipeline_direct, video_path, 'bench', 'female', False, target_languages=case.get('languages')))]
+            segments = len(jobs[0]['result']['alignment']['chunks'])
+        else:
+            stage1 = wait_for(app, app.submit_job('bench', app.process_stage1_for_review, video_path, 'bench', False))
+            metadata = stage1['result']
+            edits = {str(chunk['index']): chunk['translated_text'] for chunk in metadata['chunks']}
+            final = wait_for(app, app.submit_job('bench', app.process_final_stage_after_review, metadata['job_id'], edits, 'female'))
+            jobs = [stage1, final]; segments = len(metadata['chunks'])
+        wall = time.perf_counter() - started
+        media_seconds = case['minutes'] * 60
+        return {**{k: v for k, v in case.items() if k != 'video'}, 'segments': segments, 'wall_s': round(wall, 3), 'x_realtime': round(media_seconds / wall, 2),
+                'segments_per_s': round(segments / wall, 2), 'stages_s': stage_seconds(*jobs),
+                'service_calls': calls, 'calls_per_min': round(sum(calls.values()) / case['minutes'], 1),
+                'translate_calls_per_min': round(calls['translate'] / case['minutes'], 1),
+                'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)} # ru_maxrss is KiB on Linux
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def case_key(case):
+    key = f"{case['mode']}:{case['minutes']:g}min:asr{case['asr_ms']}:tr{case['translate_ms']}:tts{case['tts_ms']}"
+    if case.get('languages'): key += ':' + '+'.join(case['languages'])
+    if case.get('linger_ms') is not None: key += f":linger{case['linger_ms']}"
+    return key if case.get('segment_optimizer', True) else key + ':raw-segments'
+
+
+def compare(result, baseline, tolerance):
+    """Returns a description of each metric that regressed by more than tolerance."""
+    regressions = []
+    for metric in ('wall_s', 'peak_rss_mb', 'calls_per_min', 'translate_calls_per_min'):
+        if baseline.get(metric) and result[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {baseline[metric]} -> {result[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='+', default=[0.5, 2])
+    parser.add_argument('--modes', nargs='+', choices=('direct', 'review'), default=['direct', 'review'])
+    parser.add_argument('--asr-ms', type=int, default=800, help="Fake recognition latency per segment (Google ASR takes about a second)")
+    parser.add_argument('--translate-ms', type=int, default=150, help="Fake translation latency per request")
+    parser.add_argument('--tts-ms', type=int, default=200, help="Fake synthesis latency per segment")
+    parser.add_argument('--translation-linger-ms', type=int, help="TRANSLATION_BATCH_LINGER_MS for the cases (default: the app's)")
+    parser.add_argument('--no-segment-optimizer', action='store_true', help="Use the raw silence-detection segments (SEGMENT_OPTIMIZER=0)")
+    parser.add_argument('--languages', nargs='+', help="Direct mode: dub into these languages from one transcription pass (default: TARGET_LANGUAGE only)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown/growth before a case counts as a regression")
+    parser.add_argument('--case', help=argparse.SUPPRESS) # Internal: run one JSON-encoded case and print its result
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    results = {}; regressions = []
+    video_dir = tempfile.mkdtemp(prefix='bench_videos_')
+    videos = {}
+    for minutes in args.minutes:
+        videos[minutes] = os.path.join(video_dir, f"speech_{minutes:g}min.mp4")
+        make_video(videos[minutes], minutes)
+    print(f"{'case':<42} {'segs':>5} {'calls/min':>9} {'tr/min':>6} {'wall s':>8} {'x rt':>6} {'seg/s':>6} {'rss MB':>7}  " + ' '.join(f"{stage:>8}" for stage in STAGES))
+    for mode in args.modes:
+        for minutes in args.minutes:
+            case = {'mode': mode, 'minutes': minutes, 'asr_ms': args.asr_ms, 'translate_ms': args.translate_ms, 'tts_ms': args.tts_ms,
+                    'segment_optimizer': not args.no_segment_optimizer, 'linger_ms': args.translation_linger_ms}
+            if args.languages and mode == 'direct': case['languages'] = args.languages
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', json.dumps({**case, 'video': videos[minutes]})], capture_output=True, text=True)
+            if output.returncode != 0: sys.exit(f"Case {case_key(case)} failed:\n{output.stderr[-2000:]}")
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            key = case_key(case); results[key] = result
+            print(f"{key:<42} {result['segments']:>5} {result['calls_per_min']:>9.1f} {result['translate_calls_per_min']:>6.1f} {result['wall_s']:>8.2f} {result['x_realtime']:>6.1f} {result['segments_per_s']:>6.1f} "
+                  f"{result['peak_rss_mb']:>7.1f}  " + ' '.join(f"{result['stages_s'].get(stage, 0):>8.2f}" for stage in STAGES))
+            if key in baseline:
+                for regression in compare(result, baseline[key], args.tolerance): regressions.append(f"{key}: {regression}")
+    shutil.rmtree(video_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f: json.dump({**baseline, **results}, f, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
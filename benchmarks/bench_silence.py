@@ -0,0 +1,66 @@
+"""Benchmark: NumPy silence detection vs pydub.silence.detect_nonsilent.
+
+Builds synthetic "speech and pauses" audio (tone bursts with noise, some of them close to the
+silence threshold), checks that both detectors return identical ranges and prints timings.
+
+Usage:
+    python benchmarks/bench_silence.py --minutes 1 5 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+os.environ.setdefault('WARM_UP', '0') # Only the silence detector is exercised
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+
+def synthetic_speech(duration_ms, frame_rate=44100, channels=2, seed=0):
+    """Alternating voiced bursts (0.3-6 s) and pauses (0.1-2 s) with low-level background noise."""
+    rng = np.random.default_rng(seed)
+    n_frames = int(duration_ms * frame_rate / 1000)
+    signal = rng.normal(0, 30, size=n_frames) # Background hiss, well below -40 dBFS
+    position = 0
+    while position < n_frames:
+        burst = int(rng.uniform(0.3, 6.0) * frame_rate)
+        t = np.arange(min(burst, n_frames - position)) / frame_rate
+        amplitude = rng.choice([300, 800, 3000, 12000]) # Some bursts sit right around the threshold
+        signal[position:position + t.size] += amplitude * np.sin(2 * np.pi * rng.uniform(120, 400) * t)
+        position += burst + int(rng.uniform(0.1, 2.0) * frame_rate)
+    pcm = np.clip(signal, -32768, 32767).astype('<i2')
+    pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels)
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='+', default=[0.5, 2, 5])
+    parser.add_argument('--skip-pydub-over', type=float, default=30, help="Only time NumPy for longer inputs (minutes)")
+    args = parser.parse_args()
+
+    kwargs = dict(min_silence_len=app.MIN_SILENCE_LEN_MS, silence_thresh=app.SILENCE_THRESH_DBFS)
+    print(f"{'minutes':>8} {'segments':>9} {'numpy s':>9} {'pydub s':>9} {'speedup':>8}  identical")
+    for minutes in args.minutes:
+        sound = synthetic_speech(int(minutes * 60_000))
+        np_ranges, np_time = timed(app.detect_nonsilent_np, sound, **kwargs)
+        if minutes > args.skip_pydub_over:
+            print(f"{minutes:>8g} {len(np_ranges):>9} {np_time:>9.3f} {'-':>9} {'-':>8}  (pydub skipped)")
+            continue
+        pd_ranges, pd_time = timed(detect_nonsilent, sound, **kwargs)
+        print(f"{minutes:>8g} {len(np_ranges):>9} {np_time:>9.3f} {pd_time:>9.3f} {pd_time / np_time:>7.1f}x  {np_ranges == pd_ranges}")
+        if np_ranges != pd_ranges: sys.exit("Mismatch between NumPy and pydub ranges")
+
+
+if __name__ == '__main__':
+    main()
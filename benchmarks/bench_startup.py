@@ -0,0 +1,91 @@
+"""Benchmark: cold-start cost of app.py (module import, first request, warm-up/preflight).
+
+Each run is a fresh interpreter: it times `import app`, the first request for index.html and a
+synchronous warm_up(), then reports the median over the runs plus the slowest modules pulled in at
+import time (python -X importtime), so a heavy top-level import shows up as a regression.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 5 --save-baseline   # baselines are machine-specific
+    python benchmarks/bench_startup.py --runs 5 --tolerance 0.5   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'startup.json')
+RUN_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/')
+first_response = time.perf_counter()
+report = app.warm_up()
+print(json.dumps({'import_s': imported - started, 'first_response_s': first_response - started, 'ready_s': time.perf_counter() - started,
+                  'ready': report['ready'], 'checks': {name: check['seconds'] for name, check in report['checks'].items()}}))
+"""
+
+
+def run_once(env):
+    output = subprocess.run([sys.executable, '-c', RUN_SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True)
+    if output.returncode != 0: sys.exit(f"Startup run failed:\n{output.stderr[-2000:]}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env, top):
+    """(cumulative seconds, module) of the top-level imports app.py triggers, slowest first."""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env, capture_output=True, text=True)
+    modules = []; children = []
+    for line in output.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit(): continue
+        depth = len(parts[2]) - len(parts[2].lstrip()) # Children are listed before their parent, two spaces deeper
+        if depth == 1 and parts[2].strip() == 'app': modules = children
+        elif depth == 1: children = []
+        elif depth == 3: children.append((int(parts[1]) / 1e6, parts[2].strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Slowest imports to list")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    # Offline stand-ins keep the checks local; the voice list still needs the network and only warns without it
+    env = {**os.environ, 'WARM_UP': '0', 'ASR_BACKEND': os.environ.get('ASR_BACKEND', 'stub'), 'TRANSLATION_BACKEND': os.environ.get('TRANSLATION_BACKEND', 'stub')}
+    runs = [run_once(env) for _ in range(args.runs)]
+    result = {metric: round(statistics.median(run[metric] for run in runs), 3) for metric in ('import_s', 'first_response_s', 'ready_s')}
+    print(f"{'metric':<18} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for metric in result:
+        values = [run[metric] for run in runs]
+        print(f"{metric:<18} {result[metric]:>9.3f} {min(values):>7.3f} {max(values):>7.3f}")
+    print(f"ready: {sum(run['ready'] for run in runs)}/{len(runs)} runs")
+    print("warm-up checks (median s): " + ", ".join(f"{name} {statistics.median(run['checks'][name] for run in runs):.3f}" for name in runs[0]['checks']))
+    print("slowest imports:")
+    for seconds, module in slowest_imports(env, args.top): print(f"  {seconds:>7.3f}s  {module}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f: json.dump(result, f, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    regressions = [f"{metric} {baseline[metric]} -> {value}" for metric, value in result.items() if baseline.get(metric) and value > baseline[metric] * (1 + args.tolerance)]
+    if regressions:
+        print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const mainFeedbackArea = document.getElementById('mainFeedbackArea');
     const progressIndicator = document.getElementById('progressIndicator');
     const progressStep = document.getElementById('progressStep');
+    const cancelJobButton = document.getElementById('cancelJobButton');
+    const streamLink = document.getElementById('streamLink'); // Progressive HLS output of the running job
 
     // --- Elements for review stage ---
     const reviewSection = document.getElementById('reviewSection');
@@ -22,6 +24,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let isProcessingStage1 = false; // Flag for initial processing (stage 1 or direct)
     let isProcessingFinalStage = false; // Flag specifically for final stage after review
+    let activeJobId = null; // Background job currently being polled
+    let reviewStream = null; // EventSource pushing review chunks while Stage 1 runs (opt-in, see REVIEW_STREAM)
+    const JOB_POLL_INTERVAL_MS = 2000;
+    // Review chunks are polled with the job by default; ?stream=1 pushes them over SSE instead, which holds a server thread per open page
+    const REVIEW_STREAM = new URLSearchParams(window.location.search).has('stream');
 
     // --- Event Listeners ---
 
@@ -86,8 +93,68 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
 
+    // 5. Cancel Button Click -> Cancel the running background job
+    if (cancelJobButton) {
+        cancelJobButton.addEventListener('click', () => {
+            if (!activeJobId) return;
+            cancelJobButton.disabled = true;
+            fetch(`/jobs/${activeJobId}/cancel`, { method: 'POST' })
+                .then(response => response.json())
+                .then(data => { progressStep.textContent = data.message || 'Cancelling...'; })
+                .catch(error => console.error('Cancel Error:', error));
+        });
+    }
+
+
     // --- Helper Functions ---
 
+    // Parse a fetch response, turning non-2xx into an Error with the server's message
+    async function parseJsonResponse(response) {
+        if (!response.ok) {
+            let errorMsg = `Server error: ${response.status}`;
+            try { errorMsg = (await response.json()).message || errorMsg; }
+            catch (e) { try {errorMsg = await response.text()} catch(e2) {/* ignore */} }
+            throw new Error(errorMsg);
+        }
+        return response.json();
+    }
+
+    // Describe a job's current stage for the progress indicator
+    function describeJobProgress(job) {
+        if (job.status === 'queued') return 'Queued, waiting for a free worker...';
+        const progress = job.progress || {};
+        let text = job.message || job.stage || 'Processing...';
+        if (progress.total) text += ` (${progress.current}/${progress.total})`;
+        return text;
+    }
+
+    // Poll /jobs/<id> until the job finishes (calling onUpdate with each snapshot); resolves with the job's result, rejects on failure/cancel
+    function pollJob(jobId, onUpdate = null) {
+        activeJobId = jobId;
+        if (cancelJobButton) { cancelJobButton.disabled = false; cancelJobButton.style.display = 'inline-block'; }
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(`/jobs/${jobId}`)
+                    .then(parseJsonResponse)
+                    .then(job => {
+                        progressStep.textContent = describeJobProgress(job);
+                        if (streamLink && job.stream_url) { streamLink.href = job.stream_url; streamLink.style.display = 'inline-block'; }
+                        if (onUpdate) onUpdate(job);
+                        if (job.status === 'completed') resolve({ message: job.message, ...(job.result || {}) });
+                        else if (job.status === 'failed') reject(new Error(job.message || 'Processing failed.'));
+                        else if (job.status === 'cancelled') reject(new Error('Job was cancelled.'));
+                        else setTimeout(poll, JOB_POLL_INTERVAL_MS);
+                    })
+                    .catch(reject);
+            };
+            poll();
+        }).finally(() => {
+            activeJobId = null;
+            if (cancelJobButton) cancelJobButton.style.display = 'none';
+            if (streamLink) streamLink.style.display = 'none';
+        });
+    }
+
     function allowedFileExtension(filename) {
         const allowed = ['mp4', 'mov', 'avi', 'mkv', 'webm', 'flv', 'mpeg', 'mpg'];
         const ext = filename.split('.').pop().toLowerCase();
@@ -108,6 +175,9 @@ document.addEventListener('DOMContentLoaded', () => {
         // Get review preference
         const reviewPreference = reviewOptionsContainer.querySelector('input[name="reviewPreference"]:checked').value || 'direct';
         formData.append('reviewPreference', reviewPreference);
+        // Comma-separated language codes; the server defaults to Tamil if empty
+        const targetLanguagesInput = document.getElementById('targetLanguages');
+        if (targetLanguagesInput && targetLanguagesInput.value.trim()) formData.append('target_languages', targetLanguagesInput.value.trim());
 
         console.log("Sending Review Preference:", reviewPreference); // Debug
         return formData;
@@ -125,15 +195,18 @@ document.addEventListener('DOMContentLoaded', () => {
         progressIndicator.style.display = 'flex';
         hideReviewUI();
 
-        fetch(endpoint, { method: 'POST', body: payload })
-            .then(async response => {
-                if (!response.ok) {
-                    let errorMsg = `Server error: ${response.status}`;
-                    try { errorMsg = (await response.json()).message || errorMsg; }
-                    catch (e) { try {errorMsg = await response.text()} catch(e2) {/* ignore */} }
-                    throw new Error(errorMsg);
-                }
-                return response.json();
+        // Files go up in resumable chunks first; the job request then only names the finished upload
+        const file = payload.get('videoFile');
+        const uploaded = file instanceof File ? uploadResumable(file).then(uploadId => { payload.delete('videoFile'); payload.append('upload_id', uploadId); }) : Promise.resolve();
+        uploaded
+            .then(() => {
+                progressStep.textContent = 'Processing Video... This may take a while.';
+                return fetch(endpoint, { method: 'POST', body: payload });
+            })
+            .then(parseJsonResponse)
+            .then(queued => {
+                if (reviewPref === 'review' && REVIEW_STREAM) reviewStream = streamReviewChunks(queued.job_id);
+                return pollJob(queued.job_id, reviewPref === 'review' && !reviewStream ? pollReviewChunks : null); // Server answers immediately with a job ID
             })
             .then(data => {
                 console.log("Initial Processing Response:", data);
@@ -143,7 +216,12 @@ document.addEventListener('DOMContentLoaded', () => {
                     displayReviewUI(data.review_data); // Show review UI
                 } else if (data.mode === 'direct' && data.final_video_filename) {
                     setFeedback(data.message || 'Direct processing complete!', 'success');
-                    addDownloadLink(`/final_video/${data.final_video_filename}`, data.final_video_filename); // Add download link
+                    // One download link per target language (a failed language shows its error instead)
+                    const outputs = data.outputs || { '': { final_video_filename: data.final_video_filename } };
+                    Object.entries(outputs).forEach(([language, output]) => {
+                        if (output.final_video_filename) addDownloadLink(`/final_video/${output.final_video_filename}`, output.final_video_filename);
+                        else mainFeedbackArea.appendChild(Object.assign(document.createElement('p'), { textContent: `${language}: ${output.error}` }));
+                    });
                     enableUI(); // Re-enable UI for new job
                     resetInputs(); // Clear inputs
                 } else {
@@ -154,20 +232,131 @@ document.addEventListener('DOMContentLoaded', () => {
             .catch(error => {
                 console.error('Initial Processing Fetch Error:', error);
                 setFeedback(`Processing Failed: ${error.message}`, 'error');
+                hideReviewUI(); // Drop chunks streamed before the failure
+                inputSection.style.display = 'block';
                 enableUI(); // Re-enable UI fully on failure
                 resetInputs();
             })
             .finally(() => {
+                if (reviewStream) { reviewStream.close(); reviewStream = null; }
                 isProcessingStage1 = false; // Clear initial processing flag
                 progressIndicator.style.display = 'none';
                 progressStep.textContent = '';
             });
     }
 
-    // --- Display the Review UI (Remains the same, called only if mode is 'review') ---
+    // --- Resumable upload: chunks are PUT at the server's offset, so a dropped connection (or a page reload
+    // with the same file) resumes where it stopped instead of starting from zero ---
+    const UPLOAD_MAX_RETRIES = 5;
+
+    function uploadResumable(file) {
+        const storageKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+        const savedId = localStorage.getItem(storageKey);
+        const existing = savedId ? fetch(`/uploads/${savedId}`).then(response => response.ok ? response.json() : null).catch(() => null) : Promise.resolve(null);
+        return existing
+            .then(upload => upload || fetch('/uploads', { method: 'POST', headers: { 'Content-Type': 'application/json' },
+                                                          body: JSON.stringify({ filename: file.name, size: file.size }) }).then(parseJsonResponse))
+            .then(upload => {
+                localStorage.setItem(storageKey, upload.upload_id);
+                return sendUploadChunks(file, upload, 0);
+            })
+            .then(upload => { localStorage.removeItem(storageKey); return upload.upload_id; });
+    }
+
+    function sendUploadChunks(file, upload, failures) {
+        if (upload.complete) return Promise.resolve(upload);
+        progressStep.textContent = `Uploading ${file.name}... ${Math.floor(100 * upload.offset / file.size)}%`;
+        const chunk = file.slice(upload.offset, Math.min(upload.offset + upload.chunk_size, file.size));
+        return fetch(`/uploads/${upload.upload_id}`, { method: 'PUT', headers: { 'Upload-Offset': String(upload.offset) }, body: chunk })
+            .then(response => {
+                if (response.ok || response.status === 409) return response.json(); // 409: the server says where to continue
+                return parseJsonResponse(response);
+            })
+            .then(next => {
+                // A 409 at the same offset means another request is still writing this upload: back off instead of spinning
+                if (!next.complete && next.offset === upload.offset) throw new Error(next.message || 'Upload busy.');
+                return next;
+            })
+            .then(next => sendUploadChunks(file, next, 0), error => { // Only this chunk's request is retried here
+                if (failures >= UPLOAD_MAX_RETRIES) throw new Error(`Upload failed: ${error.message}`);
+                const delay = 1000 * 2 ** failures;
+                progressStep.textContent = `Upload interrupted, retrying in ${delay / 1000}s...`;
+                return new Promise(resolve => setTimeout(resolve, delay))
+                    .then(() => fetch(`/uploads/${upload.upload_id}`).then(parseJsonResponse))
+                    .then(current => sendUploadChunks(file, current, failures + 1), () => sendUploadChunks(file, upload, failures + 1));
+            });
+    }
+
+    // --- Fetch review chunks with each job poll while Stage 1 runs, so editing can start before the last chunk is translated ---
+    function pollReviewChunks(job) {
+        if (!job.review_job_id || job.status !== 'running') return; // Once finished, displayReviewUI renders the rest
+        showReviewShell(job.review_job_id);
+        // Pages are in index order, so everything before the first missing index is already shown
+        let shown = 0;
+        while (document.getElementById(`reviewChunk_${shown}`)) shown++;
+        fetchReviewPages(job.review_job_id, shown);
+    }
+
+    function fetchReviewPages(reviewJobId, offset) {
+        return fetch(`/review/${reviewJobId}/chunks?offset=${offset}`)
+            .then(parseJsonResponse)
+            .then(page => {
+                if (currentJobIdInput.value !== reviewJobId) return; // A newer attempt (re-claimed job) took over
+                page.chunks.forEach(addReviewChunk);
+                if (page.next_offset !== null) return fetchReviewPages(reviewJobId, page.next_offset);
+            })
+            .catch(error => console.warn('Review chunk poll failed:', error)); // The next job poll tries again
+    }
+
+    // --- Stream review chunks (SSE) instead, with ?stream=1 ---
+    function streamReviewChunks(jobId) {
+        if (!window.EventSource) return null; // Falls back to rendering everything when the job completes
+        const source = new EventSource(`/jobs/${jobId}/chunks/stream`);
+        source.addEventListener('review', event => showReviewShell(JSON.parse(event.data).review_job_id));
+        source.addEventListener('chunk', event => addReviewChunk(JSON.parse(event.data)));
+        source.addEventListener('end', () => source.close()); // Otherwise EventSource reconnects
+        return source;
+    }
+
+    // Empty review section for a review job; chunks are added as they arrive, submit stays disabled until Stage 1 is done
+    function showReviewShell(reviewJobId) {
+        if (currentJobIdInput.value === reviewJobId) return;
+        currentJobIdInput.value = reviewJobId;
+        reviewContent.innerHTML = '';
+        inputSection.style.display = 'none';
+        reviewSection.style.display = 'block';
+        submitEditsButton.style.display = 'block';
+        if(submitEditsButton) submitEditsButton.disabled = true;
+    }
+
+    // Insert one chunk's editor in index order (chunks may finish out of order); already shown chunks are kept as edited
+    function addReviewChunk(chunk) {
+        if (document.getElementById(`reviewChunk_${chunk.index}`)) return;
+        const reviewJobId = currentJobIdInput.value;
+        const chunkDiv = document.createElement('div');
+        chunkDiv.className = 'review-chunk';
+        chunkDiv.id = `reviewChunk_${chunk.index}`;
+        chunkDiv.dataset.chunkIndex = chunk.index;
+        chunkDiv.innerHTML = `
+            <h4>Chunk ${chunk.index + 1} (${(chunk.start_ms / 1000).toFixed(2)}s - ${(chunk.end_ms / 1000).toFixed(2)}s)</h4>
+            <div class="transcription-original">
+                <strong>Original Transcription:</strong>
+                <p>${chunk.transcribed_text || '(Transcription failed or empty)'}</p>
+                <small>Status: ${chunk.transcription_status || 'N/A'}</small>
+            </div>
+            <hr>
+            <label for="editedTranslatedText_${chunk.index}"><strong>Translated Text (Edit Below):</strong></label>
+             <small>Status: ${chunk.translation_status || 'N/A'}</small>
+            <textarea id="editedTranslatedText_${chunk.index}" data-chunk-index="${chunk.index}" rows="4">${chunk.translated_text || ''}</textarea>
+            <a href="/serve-chunk/${reviewJobId}/${chunk.original_audio_chunk}" target="_blank" download="${chunk.original_audio_chunk}">Listen to Original Chunk ${chunk.index + 1}</a>
+        `;
+        const next = Array.from(reviewContent.children).find(child => Number(child.dataset.chunkIndex) > chunk.index);
+        reviewContent.insertBefore(chunkDiv, next || null);
+    }
+
+    // --- Display the Review UI once Stage 1 has finished (adds any chunks the stream did not deliver) ---
     function displayReviewUI(reviewData) {
-        currentJobIdInput.value = reviewData.job_id;
-        reviewContent.innerHTML = ''; // Clear previous
+        showReviewShell(reviewData.job_id);
 
         if (!reviewData.chunks || reviewData.chunks.length === 0) {
              reviewContent.innerHTML = '<p>No speech segments found or Stage 1 processing failed.</p>';
@@ -178,24 +367,7 @@ document.addEventListener('DOMContentLoaded', () => {
              return;
         }
 
-        reviewData.chunks.forEach(chunk => {
-            const chunkDiv = document.createElement('div');
-            chunkDiv.className = 'review-chunk';
-            chunkDiv.innerHTML = `
-                <h4>Chunk ${chunk.index + 1} (${(chunk.start_ms / 1000).toFixed(2)}s - ${(chunk.end_ms / 1000).toFixed(2)}s)</h4>
-                <div class="transcription-original">
-                    <strong>Original Transcription:</strong>
-                    <p>${chunk.transcribed_text || '(Transcription failed or empty)'}</p>
-                    <small>Status: ${chunk.transcription_status || 'N/A'}</small>
-                </div>
-                <hr>
-                <label for="editedTranslatedText_${chunk.index}"><strong>Translated Text (Edit Below):</strong></label>
-                 <small>Status: ${chunk.translation_status || 'N/A'}</small>
-                <textarea id="editedTranslatedText_${chunk.index}" data-chunk-index="${chunk.index}" rows="4">${chunk.translated_text || ''}</textarea>
-                <a href="/serve-chunk/${reviewData.job_id}/${chunk.original_audio_chunk}" target="_blank" download="${chunk.original_audio_chunk}">Listen to Original Chunk ${chunk.index + 1}</a>
-            `;
-            reviewContent.appendChild(chunkDiv);
-        });
+        reviewData.chunks.forEach(addReviewChunk);
 
         inputSection.style.display = 'none'; // Hide initial inputs
         reviewSection.style.display = 'block'; // Show review section
@@ -236,14 +408,8 @@ document.addEventListener('DOMContentLoaded', () => {
                  tts_voice: selectedVoice
             })
         })
-        .then(async response => {
-             if (!response.ok) {
-                 let errorMsg = `Server error: ${response.status}`;
-                 try { errorMsg = (await response.json()).message || errorMsg; } catch (e) { try {errorMsg = await response.text()} catch(e2) {/* ignore */} }
-                 throw new Error(errorMsg);
-             }
-             return response.json();
-        })
+        .then(parseJsonResponse)
+        .then(queued => pollJob(queued.job_id)) // Server answers immediately with a job ID
         .then(data => {
              console.log("Final Stage Success Data:", data);
              setFeedback(data.message || 'Processing complete!', 'success');
@@ -0,0 +1,27 @@
+"""Job worker for JOB_STORE=sqlite: claims queued jobs from the shared job database and runs them.
+
+Start any number of these on the same host as the web server; they share its uploads folder and the
+SQLite job database (JOB_DB_PATH, on a local disk: SQLite locking is not reliable on network shares,
+so workers on other hosts are not supported):
+    JOB_STORE=sqlite python worker.py --slots 2
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault('JOB_STORE', 'sqlite')
+import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slots', type=int, default=app.JOB_WORKERS, help="Jobs this worker runs at once")
+    parser.add_argument('--worker-id', help="Name recorded on claimed jobs (default host:pid)")
+    parser.add_argument('--poll', type=float, default=1.0, help="Seconds between polls of an empty queue")
+    args = parser.parse_args()
+    if not app.warm_up()['ready']: sys.exit("Preflight checks failed (see above); not claiming jobs.")
+    app.run_job_worker(slots=args.slots, worker_id=args.worker_id, poll_seconds=args.poll)
+
+
+if __name__ == '__main__':
+    main()